@@ -9,36 +9,162 @@ Enhanced Anki integration script that implements a complete workflow for:
 • Populating the browser with the provided note-ID query via AnkiConnect
 
 Usage:
-    This script is invoked by `search_essential_logic/core.py`, which sends a JSON
-    payload to STDIN, e.g.:
+    `search_essential_logic/core.py` imports this module and calls `check_anki`
+    directly. It can also be run as a script, in which case it reads a JSON
+    payload from STDIN, e.g.:
 
     {"formatted_nids": "nid:123,456,789"}
 
+    AnkiConnect's guiBrowse raises the browser window itself. Add
+    ``"focus": true`` to the payload to also activate the main Anki window.
+
 No command-line arguments are supported anymore.
 """
 
 import subprocess
 import platform
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sys
-import json
-from typing import Dict, Optional
+import re
+import orjson
+from typing import Dict, Optional, Tuple
 from loguru import logger
 import ctypes
 
-# Remove any default loguru sinks (they will be configured by the parent process)
-logger.remove()
-# Add a stderr sink that only emits ERROR / CRITICAL messages
-logger.add(
-    sys.stderr,
-    level="ERROR",                              # only show errors
-    format="{time:YYYY-MM-DD HH:mm:ss} - {name} - {level} - {message}",
-    enqueue=True,
+# psutil lets macOS list processes without spawning pgrep
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def configure_standalone_logger() -> None:
+    """
+    Configure loguru for when this file runs as its own process.
+
+    Only called from ``__main__`` so that importing the module (see
+    `check_anki`) leaves the parent process's sinks untouched.
+    """
+    # Remove any default loguru sinks
+    logger.remove()
+    # Add a stderr sink that only emits ERROR / CRITICAL messages
+    logger.add(
+        sys.stderr,
+        level="ERROR",                              # only show errors
+        format="{time:YYYY-MM-DD HH:mm:ss} - {name} - {level} - {message}",
+    )
+
+# Resolve the OS once; sys.platform avoids platform.system()'s uname lookup
+_SYSTEM = (
+    "Darwin" if sys.platform == "darwin"
+    else "Windows" if sys.platform.startswith("win")
+    else platform.system()
 )
 
+# 'nid:' prefix followed somewhere by at least one digit
+_NID_QUERY_RE = re.compile(r"nid:.*\d", re.DOTALL)
+
+ANKI_CONNECT_URL = "http://localhost:8765"
+ANKI_CONNECT_TIMEOUT = 5.0
+
+# One keep-alive connection to AnkiConnect, shared by every request below.
+# Connect retries cover the window where Anki is still starting up; read and
+# status retries stay off so a slow guiBrowse is never sent twice.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=2,
+        max_retries=Retry(
+            total=2,
+            connect=2,
+            read=0,
+            status=0,
+            backoff_factor=0.1,
+            allowed_methods=frozenset(["POST"]),
+        ),
+    ),
+)
+
+
+def _post_to_anki_connect(payload: Dict) -> requests.Response:
+    """
+    POST a payload to AnkiConnect over the shared session with a default timeout.
+
+    Args:
+        payload (Dict): The AnkiConnect request body.
+
+    Returns:
+        requests.Response: The raw HTTP response.
+
+    Raises:
+        requests.exceptions.RequestException: If communication with AnkiConnect fails.
+    """
+    return _SESSION.post(ANKI_CONNECT_URL, json=payload, timeout=ANKI_CONNECT_TIMEOUT)
+
+# Toolhelp32 snapshot structures (Windows process enumeration without tasklist)
+_TH32CS_SNAPPROCESS = 0x00000002
+_INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+
+class _PROCESSENTRY32W(ctypes.Structure):
+    _fields_ = [
+        ("dwSize", ctypes.c_ulong),
+        ("cntUsage", ctypes.c_ulong),
+        ("th32ProcessID", ctypes.c_ulong),
+        ("th32DefaultHeapID", ctypes.c_size_t),
+        ("th32ModuleID", ctypes.c_ulong),
+        ("cntThreads", ctypes.c_ulong),
+        ("th32ParentProcessID", ctypes.c_ulong),
+        ("pcPriClassBase", ctypes.c_long),
+        ("dwFlags", ctypes.c_ulong),
+        ("szExeFile", ctypes.c_wchar * 260),
+    ]
+
 # --------------------------------------------------------------------------- #
 # Helper functions
 # --------------------------------------------------------------------------- #
+def _is_process_running_windows(exe_name: str) -> bool:
+    """
+    Walk a Toolhelp32 process snapshot looking for the given executable.
+
+    Args:
+        exe_name (str): Executable name to look for (e.g., "anki.exe").
+
+    Returns:
+        bool: True if a process with that executable name exists, False otherwise.
+
+    Raises:
+        OSError: If the process snapshot cannot be created.
+    """
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = ctypes.c_void_p
+    kernel32.Process32FirstW.argtypes = [ctypes.c_void_p, ctypes.POINTER(_PROCESSENTRY32W)]
+    kernel32.Process32NextW.argtypes = [ctypes.c_void_p, ctypes.POINTER(_PROCESSENTRY32W)]
+    kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+
+    snapshot = kernel32.CreateToolhelp32Snapshot(_TH32CS_SNAPPROCESS, 0)
+    if snapshot is None or snapshot == _INVALID_HANDLE_VALUE:
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    try:
+        entry = _PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(_PROCESSENTRY32W)
+        target = exe_name.casefold()
+        found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while found:
+            if entry.szExeFile.casefold() == target:
+                return True
+            found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+        return False
+    finally:
+        kernel32.CloseHandle(snapshot)
+
+
 def is_program_running(program_name: str) -> bool:
     """
     Check if a program is running on macOS or Windows.
@@ -52,24 +178,22 @@ def is_program_running(program_name: str) -> bool:
     Raises:
         Exception: If there's an error checking the program status.
     """
-    system = platform.system()
-    logger.debug(f"Checking if {program_name} is running on {system}")
+    logger.debug(f"Checking if {program_name} is running on {_SYSTEM}")
     try:
-        if system == "Darwin":  # macOS
+        if _SYSTEM == "Darwin":  # macOS
+            if PSUTIL_AVAILABLE:
+                return any(
+                    proc.info["name"] == program_name
+                    for proc in psutil.process_iter(["name"])
+                )
             res = subprocess.run(
                 ["pgrep", "-x", program_name], stdout=subprocess.PIPE, stderr=subprocess.PIPE
             )
             return res.returncode == 0
-        elif system == "Windows":
-            res = subprocess.run(
-                ["tasklist", "/FI", f"IMAGENAME eq {program_name}.exe"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
-            return f"{program_name}.exe" in res.stdout
+        elif _SYSTEM == "Windows":
+            return _is_process_running_windows(f"{program_name}.exe")
         else:
-            logger.error(f"Unsupported operating system: {system}")
+            logger.error(f"Unsupported operating system: {_SYSTEM}")
             return False
     except Exception as exc:
         logger.error(f"Error checking if {program_name} is running: {exc}")
@@ -80,85 +204,38 @@ def bring_anki_to_front() -> bool:
     """
     Bring the Anki window to the foreground.
 
+    AnkiConnect's guiBrowse already raises the browser, so this is only needed
+    when the caller opts in with ``"focus": true`` on STDIN.
+
     Returns:
         bool: True if successfully brought Anki to front, False otherwise.
 
     Raises:
         Exception: If there's an error bringing the window to front.
     """
-    system = platform.system()
-    logger.debug(f"Attempting to bring Anki to front on {system}")
+    logger.debug(f"Attempting to bring Anki to front on {_SYSTEM}")
     try:
-        if system == "Darwin":
+        if _SYSTEM == "Darwin":
             cmd = ["osascript", "-e", 'tell application "Anki" to activate']
             return subprocess.run(cmd, capture_output=True, text=True).returncode == 0
-        elif system == "Windows":
-            logger.info("Attempting to bring Anki to front using Windows commands …")
-            cmd = [
-                "powershell",
-                """
-                Add-Type @"
-                    using System;
-                    using System.Runtime.InteropServices;
-                    public class Win32 {
-                        [DllImport("user32.dll")]
-                        public static extern bool SetForegroundWindow(IntPtr hWnd);
-                        [DllImport("user32.dll")]
-                        public static extern IntPtr FindWindow(string lpClassName, string lpWindowName);
-                    }
-"@
-                $hwnd = [Win32]::FindWindow($null, "Anki")
-                [Win32]::SetForegroundWindow($hwnd)
-            """,
-            ]
-            return subprocess.run(cmd, capture_output=True, text=True).returncode == 0
+        elif _SYSTEM == "Windows":
+            # Call user32 directly rather than compiling an Add-Type helper in PowerShell
+            user32 = ctypes.WinDLL("user32", use_last_error=True)
+            user32.FindWindowW.restype = ctypes.c_void_p
+            user32.SetForegroundWindow.argtypes = [ctypes.c_void_p]
+            hwnd = user32.FindWindowW(None, "Anki")
+            if not hwnd:
+                logger.error("Could not find the Anki window")
+                return False
+            return bool(user32.SetForegroundWindow(hwnd))
         else:
-            logger.error(f"Unsupported operating system for window focus: {system}")
+            logger.error(f"Unsupported operating system for window focus: {_SYSTEM}")
             return False
     except Exception as exc:
         logger.error(f"Error bringing Anki to front: {exc}")
         return False
 
 
-def populate_anki_browser(query: str) -> bool:
-    """
-    Populate Anki's browser with the given search query using AnkiConnect.
-
-    Args:
-        query (str): The search query to send to Anki browser.
-
-    Returns:
-        bool: True if successfully populated the browser, False otherwise.
-
-    Raises:
-        requests.exceptions.RequestException: If communication with AnkiConnect fails.
-        Exception: For any other unexpected errors.
-    """
-    if not query:
-        logger.warning("Empty query provided to populate_anki_browser")
-        return False
-
-    url = "http://localhost:8765"
-    payload = {"action": "guiBrowse", "version": 6, "params": {"query": query}}
-
-    try:
-        logger.info(f"Sending request to AnkiConnect: {payload}")
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        result = response.json()
-        if result.get("error"):
-            logger.error(f"AnkiConnect returned error: {result['error']}")
-            return False
-        logger.info("Successfully populated Anki browser")
-        return True
-    except requests.exceptions.RequestException as exc:
-        logger.error(f"Failed to communicate with AnkiConnect: {exc}")
-        return False
-    except Exception as exc:
-        logger.error(f"Unexpected error in populate_anki_browser: {exc}")
-        return False
-
-
 def read_input_data() -> Dict:
     """
     Read and parse JSON input data from STDIN.
@@ -168,17 +245,17 @@ def read_input_data() -> Dict:
             'formatted_nids' key. Returns {'formatted_nids': ''} if input is invalid.
 
     Raises:
-        json.JSONDecodeError: If the input is not valid JSON.
+        orjson.JSONDecodeError: If the input is not valid JSON.
         Exception: For any other unexpected errors.
     """
     try:
-        raw = sys.stdin.read()
-        logger.info(f"Raw input data received: {raw}")
+        raw = sys.stdin.buffer.read()
+        logger.debug(f"Raw input data received: {raw}")
         if not raw:
             logger.error("No input received on STDIN")
             return {"formatted_nids": ""}
-        return json.loads(raw)
-    except json.JSONDecodeError as exc:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError as exc:
         logger.error(f"Failed to parse JSON input: {exc}")
         return {"formatted_nids": ""}
     except Exception as exc:
@@ -197,87 +274,147 @@ def validate_nids_query(query: str) -> bool:
         bool: True if the query is valid (starts with 'nid:' and contains digits),
             False otherwise.
     """
-    return bool(query) and query.startswith("nid:") and any(c.isdigit() for c in query)
+    return bool(query) and _NID_QUERY_RE.match(query) is not None
 
 
-def check_anki_connect_version() -> Optional[str]:
+def check_version_and_populate_browser(query: str) -> Tuple[Optional[str], bool]:
     """
-    Check the version of AnkiConnect and verify if it's reachable.
+    Probe AnkiConnect and populate the browser in a single `multi` request.
 
-    Returns:
-        Optional[str]: The version string if AnkiConnect is reachable, None otherwise.
+    Args:
+        query (str): The search query to send to Anki browser.
 
-    Raises:
-        Exception: If there's an error communicating with AnkiConnect.
+    Returns:
+        Tuple[Optional[str], bool]: The AnkiConnect version (None if unreachable)
+            and whether the browser was populated successfully.
     """
-    url = "http://localhost:8765"
-    payload = {"action": "version", "version": 6}
+    actions = [{"action": "version", "version": 6}]
+    if query:
+        actions.append({"action": "guiBrowse", "version": 6, "params": {"query": query}})
+    else:
+        logger.warning("Empty query provided to check_version_and_populate_browser")
+    payload = {"action": "multi", "version": 6, "params": {"actions": actions}}
+
     try:
-        response = requests.post(url, json=payload, timeout=5.0)
+        logger.debug(f"Sending request to AnkiConnect: {payload}")
+        response = _post_to_anki_connect(payload)
         response.raise_for_status()
-        version = response.json().get("result")
-        logger.info(f"AnkiConnect version: {version}")
-        return version
+        result = response.json()
+        if result.get("error"):
+            logger.error(f"AnkiConnect returned error: {result['error']}")
+            return None, False
+        results = result.get("result") or []
     except Exception as exc:
-        logger.error(f"Error checking AnkiConnect version: {exc}")
-        return None
+        logger.error(f"Failed to communicate with AnkiConnect: {exc}")
+        return None, False
+
+    # With version 6 each action's outcome is wrapped as {"result": ..., "error": ...}
+    outcomes = [
+        (r.get("result"), r.get("error")) if isinstance(r, dict) else (r, None)
+        for r in results
+    ]
+
+    version = outcomes[0][0] if outcomes else None
+    logger.info(f"AnkiConnect version: {version}")
+    if version is None or len(outcomes) < 2:
+        return version, False
+
+    browse_error = outcomes[1][1]
+    if browse_error:
+        logger.error(f"AnkiConnect returned error: {browse_error}")
+        return version, False
+    logger.info("Successfully populated Anki browser")
+    return version, True
+
+
+def write_result(result: Dict) -> None:
+    """
+    Write the workflow result to stdout as a single line of JSON.
+
+    Args:
+        result (Dict): The result dictionary to serialise.
+    """
+    out = sys.stdout.buffer
+    out.write(orjson.dumps(result))
+    out.write(b"\n")
+    out.flush()
 
 
 # --------------------------------------------------------------------------- #
-# Main entry point
+# Workflow
 # --------------------------------------------------------------------------- #
-def main() -> None:
+def check_anki(formatted_nids: str, focus: bool = False) -> Dict:
     """
-    Main entry point for the Anki workflow.
-
-    This function orchestrates the entire workflow:
-    1. Reads input data from STDIN
-    2. Checks if the operating system is supported
-    3. Verifies if Anki is running
-    4. Checks AnkiConnect availability
-    5. Brings Anki to front and populates the browser with the query
-
-    The function prints a JSON result to stdout containing:
-    - anki_status: Current status of Anki
-    - success: Boolean indicating if the operation was successful
-    - message: Descriptive message about the operation result
+    Run the Anki workflow for a note-ID query and return the outcome.
+
+    This is the in-process entry point used by `search_essential_logic/core.py`;
+    `main` wraps it for STDIN/STDOUT use. The workflow:
+    1. Checks if the operating system is supported
+    2. Checks AnkiConnect availability and populates the browser with the query
+       in a single batched request
+    3. Brings Anki to front when requested, or, if AnkiConnect did not answer, verifies
+       whether Anki is running to report the failure
+
+    Args:
+        formatted_nids (str): The note-ID query, e.g. "nid:123,456,789".
+        focus (bool): Also activate the main Anki window. Defaults to False.
+
+    Returns:
+        Dict: A result dictionary containing:
+            - anki_status: Current status of Anki
+            - success: Boolean indicating if the operation was successful
+            - message: Descriptive message about the operation result
     """
-    input_data = read_input_data()
-    built_nid_list = input_data.get("formatted_nids", "")
-    logger.info(f"Received NID list from STDIN: {built_nid_list}")
+    logger.debug(f"Received NID list: {formatted_nids}")
 
     result = {"anki_status": "myy_error", "success": False, "message": ""}
 
     # OS check
-    system = platform.system()
-    if system not in {"Darwin", "Windows"}:
-        result["message"] = f"Unsupported operating system: {system}"
-        print(json.dumps(result))
-        return
-
-    # Is Anki running?
-    if is_program_running("anki"):
+    if _SYSTEM not in {"Darwin", "Windows"}:
+        result["message"] = f"Unsupported operating system: {_SYSTEM}"
+        return result
+
+    # AnkiConnect reachable? Probe and populate the browser in one round-trip.
+    # A reply means Anki is running, so the process scan is only needed to
+    # explain a failed probe.
+    version, populated = check_version_and_populate_browser(formatted_nids)
+    if version is not None:
         result["anki_status"] = "Anki is running"
 
-        # AnkiConnect reachable?
-        version = check_anki_connect_version()
-        if version is None:
-            result["message"] = "Failed to contact AnkiConnect"
-            print(json.dumps(result))
-            return
-
-        # Bring window forward & populate browser
-        if bring_anki_to_front() and populate_anki_browser(built_nid_list):
+        # guiBrowse raised the browser; only activate Anki itself on request
+        if populated and (not focus or bring_anki_to_front()):
             result["success"] = True
             result["message"] = "Successfully opened Anki browser with query"
         else:
             result["message"] = "Failed to focus/populate Anki"
+    elif is_program_running("anki"):
+        result["anki_status"] = "Anki is running"
+        result["message"] = "Failed to contact AnkiConnect"
     else:
         result["anki_status"] = "Anki not running"
         result["message"] = "Anki is not running"
 
-    print(json.dumps(result))
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# Main entry point
+# --------------------------------------------------------------------------- #
+def main() -> None:
+    """
+    Main entry point for the Anki workflow when run as a script.
+
+    Reads input data from STDIN, runs `check_anki`, and prints its JSON result
+    to stdout.
+    """
+    input_data = read_input_data()
+    result = check_anki(
+        input_data.get("formatted_nids", ""),
+        focus=bool(input_data.get("focus", False)),
+    )
+    write_result(result)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    configure_standalone_logger()
+    main()
@@ -19,9 +19,6 @@ Example:
 import sys
 import json
 import argparse
-from rich.console import Console
-from rich.json import JSON
-from search_essential_logic import search_flashcards, configure_logger, load_searcher_context
 
 def main():
     """Parse command line arguments and execute flashcard search.
@@ -64,10 +61,6 @@ def main():
         help="Set logging level"
     )
     args = parser.parse_args()
-    
-    # Set log level from command line if provided
-    if args.log_level:
-        configure_logger(args.log_level)
 
     # ------------------------------------------------------------------
     # Friendly CLI Quick-Guide for non-programmers
@@ -109,6 +102,13 @@ Copy & paste any command above directly into your terminal.
         print(guide_text)
         sys.exit(0)
 
+    # Deferred so --help and the guide don't pay for loading the search stack
+    from search_essential_logic import search_flashcards, configure_logger, load_searcher_context
+
+    # Set log level from command line if provided
+    if args.log_level:
+        configure_logger(args.log_level)
+
     try:
         runtime_config_dictionary = load_searcher_context(args.config)
         result = search_flashcards(runtime_config_dictionary, args.query)
@@ -118,6 +118,8 @@ Copy & paste any command above directly into your terminal.
             print(json.dumps(result, indent=2))
         elif args.rich:
             # Output as rich colored JSON
+            from rich.console import Console
+            from rich.json import JSON
             console = Console()
             json_str = json.dumps(result, indent=2)
             console.print(JSON(json_str))
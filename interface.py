@@ -13,7 +13,6 @@
 # =============================================================================
 
 from search_essential_logic import load_searcher_context, search_flashcards, configure_logger
-import textwrap
 import json
 import argparse
 import subprocess
@@ -27,11 +26,10 @@ from rich import print as rprint
 from rich.markdown import Markdown
 import os
 import re
+import functools
+import numpy as np
 from loguru import logger
 
-# Configure logging to only show errors
-configure_logger("ERROR")
-
 # Add asciichartpy for terminal plotting
 try:
     import asciichartpy as acp
@@ -42,6 +40,18 @@ except ImportError:
 
 console = Console()
 
+CONFIG_PATH = "search_essential_logic/config.json"
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> dict:
+    """Reads config.json once and caches it for the rest of the session.
+
+    Returns:
+        dict: Parsed configuration. Callers must treat it as read-only.
+    """
+    with open(CONFIG_PATH) as f:
+        return json.load(f)
+
 def display_stats(flashcard_count: int, embedding_count: int) -> None:
     """Displays the count of loaded flashcards and embeddings.
 
@@ -72,14 +82,18 @@ def create_similarity_plot(top_cards_sim: list, width: int = 140) -> str:
     if not PLOTTING_AVAILABLE or len(top_cards_sim) < 2:
         return None
 
-    scores = [card["cosine_similarity_score"] for card in top_cards_sim]
+    scores = np.fromiter(
+        (card["cosine_similarity_score"] for card in top_cards_sim),
+        dtype=np.float64,
+        count=len(top_cards_sim),
+    )
 
     # ---------------------------------------------------------------
     # 1) How wide are the labels on the left side of the chart?
     # ---------------------------------------------------------------
     fmt = "{:7.3f}"                        # keep labels compact
-    label_max = fmt.format(max(scores))
-    label_min = fmt.format(min(scores))
+    label_max = fmt.format(scores.max())
+    label_min = fmt.format(scores.min())
     offset = max(len(label_max), len(label_min)) + 2   # +2 for " ┤"
 
     # ---------------------------------------------------------------
@@ -89,16 +103,12 @@ def create_similarity_plot(top_cards_sim: list, width: int = 140) -> str:
     target_len = min(available_cols, len(scores))
 
     if len(scores) > target_len:
-        ratio = len(scores) / target_len
-        compressed = []
-        for i in range(target_len):
-            start = int(i * ratio)
-            end   = int((i + 1) * ratio)
-            seg   = scores[start:end] or [scores[start]]
-            compressed.append(sum(seg) / len(seg))
-        plot_scores = compressed
+        # Bin-mean over target_len contiguous segments in one vectorised pass
+        starts = (np.arange(target_len) * len(scores) // target_len).astype(np.intp)
+        seg_lens = np.diff(np.append(starts, len(scores)))
+        plot_scores = (np.add.reduceat(scores, starts) / seg_lens).tolist()
     else:
-        plot_scores = scores
+        plot_scores = scores.tolist()
 
     plot_cfg = {
         "height": 12,
@@ -131,10 +141,7 @@ def format_flashcard_results_for_terminal(
     # because display settings are purely interface-related and not part of the core program logic.
     # The runtime_config_dictionary is reserved for core functionality like search and ranking,
     # while interface.py handles only display-related features.
-    config_path = "search_essential_logic/config.json"
-    with open(config_path) as f:
-        config = json.load(f)
-    display_settings = config.get('display_settings', {})
+    display_settings = _load_config().get('display_settings', {})
     show_context_window = display_settings.get('show_context_window', True)  # Default to True if not specified
     show_similarity_pattern = display_settings.get('show_similarity_pattern', True)  # Default to True if not specified
     
@@ -150,10 +157,14 @@ def format_flashcard_results_for_terminal(
         table.add_column("Content", style="#E0E0E0")
         
         for card in per_search_result_dictionary['reranked_cards']:
+            # Collapse whitespace onto one line, then slice; far cheaper than textwrap.shorten
+            content = " ".join(str(card['content']).split())
+            if len(content) > max_length:
+                content = content[:max_length - 1] + "…"
             table.add_row(
                 str(card['relevance_rank']),
                 f"{card['nid']}",
-                textwrap.shorten(str(card['content']), width=max_length, placeholder="…")
+                content
             )
         
         console.print(table)
@@ -232,10 +243,29 @@ def display_welcome_art() -> None:
 class SearchProgressHandler:
     PREFIX = "Searching flashcards…"
 
+    _TOOK_RE = re.compile(r"\(took ([0-9.]+)s\)")
+
+    # (substring in log message, timeline label)
+    _PLAIN = (
+        ("embed api call", "embed api call"),
+        ("Completed cosine similarity", "compute similarity"),
+        ("Calling Cohere rerank API", "reranker api call"),
+        ("llm api call", "llm api call"),
+        ("Search workflow completed", "Success!"),
+    )
+
+    # Log-message prefixes that carry a "(took Xs)" duration
+    _TIMED = (
+        "embed api answer",
+        "reranker api answer",
+        "llm api answer",
+    )
+
     def __init__(self, console: Console):
         self.console = console
         self.status_cm = None
         self.parts: list[str] = []
+        self._roots: set[str] = set()
 
     def _render(self) -> None:
         suffix = " → ".join(self.parts)
@@ -243,9 +273,11 @@ class SearchProgressHandler:
 
     def _add(self, part: str) -> None:
         root = part.split(" (")[0]
-        if not any(p.startswith(root) for p in self.parts):
-            self.parts.append(part)
-            self._render()
+        if root in self._roots:
+            return
+        self._roots.add(root)
+        self.parts.append(part)
+        self._render()
 
     def __enter__(self):
         self.status_cm = self.console.status(f"[cyan]{self.PREFIX}", spinner="dots")
@@ -261,37 +293,17 @@ class SearchProgressHandler:
     def __call__(self, msg):
         text: str = msg.record["message"]
 
-        # embed
-        if "embed api call" in text:
-            self._add("embed api call")
-        elif text.startswith("embed api answer"):
-            m = re.search(r"\(took ([0-9.]+)s\)", text)
-            dur = f" ({m.group(1)}s)" if m else ""
-            self._add(f"embed api answer{dur}")
-
-        # similarity
-        elif "Completed cosine similarity" in text:
-            self._add("compute similarity")
-
-        # reranker
-        elif "Calling Cohere rerank API" in text:
-            self._add("reranker api call")
-        elif text.startswith("reranker api answer"):
-            m = re.search(r"\(took ([0-9.]+)s\)", text)
-            dur = f" ({m.group(1)}s)" if m else ""
-            self._add(f"reranker api answer{dur}")
-
-        # llm
-        elif "llm api call" in text:
-            self._add("llm api call")
-        elif text.startswith("llm api answer"):
-            m = re.search(r"\(took ([0-9.]+)s\)", text)
-            dur = f" ({m.group(1)}s)" if m else ""
-            self._add(f"llm api answer{dur}")
-
-        # finished
-        elif "Search workflow completed" in text:
-            self._add("Success!")
+        for needle, label in self._PLAIN:
+            if needle in text:
+                self._add(label)
+                return
+
+        for prefix in self._TIMED:
+            if text.startswith(prefix):
+                m = self._TOOK_RE.search(text)
+                dur = f" ({m.group(1)}s)" if m else ""
+                self._add(f"{prefix}{dur}")
+                return
 
 def main() -> None:
     """Main entry point for the flashcard search application.
@@ -305,12 +317,14 @@ def main() -> None:
     Returns:
         None
     """
+    # Configure logging to only show errors
+    configure_logger("ERROR")
+
     # Use direct config path instead of command line arg
-    config_path = "search_essential_logic/config.json"
+    config_path = CONFIG_PATH
 
     # Get the HDF5 file path from the config first
-    with open(config_path) as f:
-        config = json.load(f)
+    config = _load_config()
     full_path = config.get('myy_hdf5_location', {}).get('h5_file', 'path not found')
     
     # Get just the filename if path is found
@@ -331,6 +345,10 @@ def main() -> None:
     # Add clear visual separation with multiple newlines
     console.print("\n\n\n")
 
+    # Silence the search package between queries; loguru's disable check
+    # returns before any message formatting happens
+    logger.disable("search_essential_logic")
+
     query = None
     while True:
         if not query:
@@ -348,9 +366,13 @@ def main() -> None:
             sink_id = logger.add(progress, level="INFO")
 
             with progress:                                   # shows spinner
-                per_search_result_dictionary = search_flashcards(
-                    runtime_config_dictionary, query
-                )
+                logger.enable("search_essential_logic")
+                try:
+                    per_search_result_dictionary = search_flashcards(
+                        runtime_config_dictionary, query
+                    )
+                finally:
+                    logger.disable("search_essential_logic")
 
             logger.remove(sink_id)                           # clean up sink
 
@@ -5,11 +5,12 @@ This package provides functionality for loading and searching through flashcard
 using semantic embeddings and natural language processing.
 """
 
-from .data_loader import load_from_hdf5, load_searcher_context
-from .core import search_flashcards, configure_logger
+from .data_loader import load_from_hdf5, load_searcher_context, build_ann_index
+from .core import search_flashcards, search_flashcards_async, search_flashcards_batch, configure_logger
 from .myy_api import embedding_service, deepseek_service
 from .flow import (
     get_top_n_similarities_and_indices,
+    get_top_n_from_ann_index,
     prepare_top_cards_list,
     format_flashcard_results_for_llm
 )
@@ -17,11 +18,15 @@ from .flow import (
 __all__ = [
     'load_from_hdf5',
     'load_searcher_context',
+    'build_ann_index',
     'search_flashcards',
+    'search_flashcards_async',
+    'search_flashcards_batch',
     'configure_logger',
     'embedding_service',
     'deepseek_service',
     'get_top_n_similarities_and_indices',
+    'get_top_n_from_ann_index',
     'prepare_top_cards_list',
     'format_flashcard_results_for_llm',
 ] 
\ No newline at end of file
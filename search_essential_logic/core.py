@@ -2,23 +2,43 @@
 
 import os
 import json
+import asyncio
 import re
 import numpy as np
 import pandas as pd
 import h5py
 import subprocess
+import importlib.util
 import sys
 from loguru import logger
 from .data_loader import load_searcher_context
 from .myy_api import embedding_service, deepseek_service
 from .flow import (
     get_top_n_similarities_and_indices,
+    get_top_n_from_ann_index,
     prepare_top_cards_list,
     format_flashcard_results_for_llm,
     chat_with_final_llm
 )
 from .rerank import rerank_workflow
-from typing import List
+from .semantic_cache import SemanticCache
+from typing import List, Optional
+
+# Prior search results, matched by query-embedding similarity. Entries keep
+# only _SEMANTIC_CACHE_FIELDS (~200 reranked cards, roughly 0.2-0.5 MB each),
+# so 128 entries stay within a few tens of MB
+semantic_cache = SemanticCache(max_items=128)
+
+# What a semantic cache hit returns; the ~500 similarity matches and the full
+# LLM prompt make up most of a result and are left out
+_SEMANTIC_CACHE_FIELDS = (
+    "query",
+    "reranked_cards",
+    "llm_response",
+    "extracted_nid_list",
+    "formatted_nids",
+    "llm_ranked_cards",
+)
 
 ##################################################
 ############### Loguru Configuration  ############
@@ -51,9 +71,6 @@ def configure_logger(level: str = "INFO") -> None:
         enqueue=True,
     )
 
-# Initialise at import-time so any early log lines are captured.
-configure_logger()
-
 # --- Utility Functions ---
 
 
@@ -90,15 +107,84 @@ def format_nids_for_anki(per_search_result_dictionary: dict) -> dict:
     per_search_result_dictionary['formatted_nids'] = formatted_nids
     return per_search_result_dictionary
 
-def check_anki_status(per_search_result_dictionary: dict = None) -> str:
+_ANKI_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "anki_script.py"
+)
+_anki_script_module = None
+
+
+def _load_anki_script():
+    """Imports anki_script.py from the project root once and caches the module.
+
+    Returns:
+        module: The loaded anki_script module.
+
+    Raises:
+        ImportError: If the script cannot be loaded.
+    """
+    global _anki_script_module
+    if _anki_script_module is None:
+        spec = importlib.util.spec_from_file_location("anki_script", _ANKI_SCRIPT)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Cannot load Anki script from {_ANKI_SCRIPT}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _anki_script_module = module
+    return _anki_script_module
+
+
+def _run_anki_script_subprocess(formatted_nids: str, focus: bool = False) -> dict:
+    """Runs anki_script.py in a separate interpreter and parses its JSON reply.
+
+    Args:
+        formatted_nids (str): Anki-formatted NID query.
+        focus (bool, optional): Ask the script to bring Anki to the front.
+
+    Returns:
+        dict: The script's response, or None if its output isn't valid JSON.
+    """
+    # -------------------------------------------------
+    # Send the data to the script via STDIN as JSON
+    # -------------------------------------------------
+    stdin_payload = json.dumps({"formatted_nids": formatted_nids, "focus": focus})
+
+    result = subprocess.run(
+        [sys.executable, _ANKI_SCRIPT],   # Use current Python interpreter (respects venv)
+        input=stdin_payload,   # JSON piped through STDIN
+        capture_output=True,
+        text=True
+    )
+
+    # Log any stderr output for debugging
+    if result.stderr:
+        logger.error(f"Script error output: {result.stderr}")
+
+    # Log the raw stdout for debugging
+    logger.debug(f"Raw script output: {result.stdout}")
+
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        logger.error(f"Failed to parse script output: {result.stdout}")
+        return None
+
+
+def check_anki_status(
+    per_search_result_dictionary: dict = None, in_process: bool = True, focus: bool = False
+) -> str:
     """Checks if Anki is running and processes formatted NIDs.
 
-    Verifies Anki's running status and sends formatted NIDs to anki_script.py
-    via stdin instead of command-line arguments.
+    Verifies Anki's running status and opens the formatted NIDs in the Anki
+    browser via anki_script.py. By default the script is imported and called
+    in-process; the subprocess path is kept for when isolation is wanted.
 
     Args:
         per_search_result_dictionary (dict, optional): Dictionary containing search
             results with formatted_nids. Defaults to None.
+        in_process (bool, optional): Call anki_script.check_anki directly instead of
+            spawning a new interpreter. Defaults to True.
+        focus (bool, optional): Bring the Anki window to the front after populating
+            the browser. Defaults to False.
 
     Returns:
         str: Status message indicating Anki's state or error message if something
@@ -106,13 +192,8 @@ def check_anki_status(per_search_result_dictionary: dict = None) -> str:
 
     Raises:
         subprocess.SubprocessError: If there's an error running the anki script.
-        json.JSONDecodeError: If the response cannot be parsed as JSON.
     """
-    # Get the absolute path of the current file
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    script = os.path.join(os.path.dirname(current_dir), "anki_script.py")
-
-    logger.debug(f"Checking Anki status using script: {script}")
+    logger.debug(f"Checking Anki status using script: {_ANKI_SCRIPT}")
 
     try:
         # Extract the formatted NID string (may be empty)
@@ -121,35 +202,18 @@ def check_anki_status(per_search_result_dictionary: dict = None) -> str:
             formatted_nids = per_search_result_dictionary.get("formatted_nids", "")
             logger.debug(f"Using formatted NIDs: {formatted_nids}")
 
-        # -------------------------------------------------
-        # Send the data to the script via STDIN as JSON
-        # -------------------------------------------------
-        stdin_payload = json.dumps({"formatted_nids": formatted_nids})
-
-        result = subprocess.run(
-            [sys.executable, script],   # Use current Python interpreter (respects venv)
-            input=stdin_payload,   # JSON piped through STDIN
-            capture_output=True,
-            text=True
-        )
-
-        # Log any stderr output for debugging
-        if result.stderr:
-            logger.error(f"Script error output: {result.stderr}")
+        if in_process:
+            response = _load_anki_script().check_anki(formatted_nids, focus=focus)
+        else:
+            response = _run_anki_script_subprocess(formatted_nids, focus=focus)
+            if response is None:
+                return "Error: Invalid response format from script"
 
-        # Log the raw stdout for debugging
-        logger.debug(f"Raw script output: {result.stdout}")
-
-        # Parse and validate the JSON response
-        try:
-            response = json.loads(result.stdout)
-            if not isinstance(response, dict) or "anki_status" not in response:
-                logger.error(f"Invalid response structure: {response}")
-                return "Error: Invalid response structure from script"
-            return response.get("anki_status", "Error: Invalid response from script")
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse script output: {result.stdout}")
-            return "Error: Invalid response format from script"
+        # Validate the response
+        if not isinstance(response, dict) or "anki_status" not in response:
+            logger.error(f"Invalid response structure: {response}")
+            return "Error: Invalid response structure from script"
+        return response.get("anki_status", "Error: Invalid response from script")
 
     except Exception as e:
         logger.error(f"Error checking Anki status: {e}")
@@ -160,6 +224,8 @@ def check_anki_status(per_search_result_dictionary: dict = None) -> str:
 ############### LLM_rank Stuff  #####################
 ##################################################
 
+_NID_PATTERN = re.compile(r'\[nid:(\d{13})\]')
+
 
 def extract_nid(text: str) -> List[str]:
     """Extracts 13-digit ID numbers from text wrapped in [nid:number] format.
@@ -178,9 +244,7 @@ def extract_nid(text: str) -> List[str]:
         >>> extract_nid("[nid:1234567890123] some text")
         ['1234567890123']
     """
-    pattern = r'\[nid:(\d{13})\]'
-    nid_list = re.findall(pattern, text)
-    return nid_list
+    return _NID_PATTERN.findall(text)
 
 
 
@@ -212,9 +276,8 @@ def create_llm_ranked_cards(reranked_cards: list, extracted_nids: list) -> list:
     # Process cards in order of extracted_nid_list
     for rank, nid in enumerate(extracted_nids, 1):
         if nid in nid_to_card:
-            ranked_card = nid_to_card[nid].copy()
-            ranked_card["llm_rank"] = rank
-            llm_ranked_cards.append(ranked_card)
+            # One C-level copy+update; reranked_cards stays untouched since callers keep it
+            llm_ranked_cards.append(dict(nid_to_card[nid], llm_rank=rank))
             
     return llm_ranked_cards
 
@@ -222,7 +285,9 @@ def create_llm_ranked_cards(reranked_cards: list, extracted_nids: list) -> list:
 ############### Search Meat  #####################
 ##################################################
 
-def search_flashcards(runtime_config_dictionary: dict, query_text: str) -> dict:
+def search_flashcards(
+    runtime_config_dictionary: dict, query_text: str, open_in_anki: bool = True
+) -> dict:
     """Executes complete flashcard search workflow with reranking.
 
     Performs a multi-step search process:
@@ -240,7 +305,16 @@ def search_flashcards(runtime_config_dictionary: dict, query_text: str) -> dict:
             - num_wanted_back_from_cohere: Number of results for reranking
             - personal_LLM_prompt: Template for LLM prompt
             - in_prompt_number: Number to use in prompt formatting
+            - semantic_cache_threshold (optional): Cosine similarity above which a
+              prior query's result is reused; None disables the semantic cache
+            - ann_index (optional): hnswlib index used instead of exact search
+            - anki_in_process (optional): Call anki_script in-process (default) rather
+              than in a subprocess
+            - anki_focus (optional): Bring Anki to the front once the browser is
+              populated (default False)
         query_text (str): The search query text.
+        open_in_anki (bool, optional): Open the results in the Anki browser. When
+            False the Anki step is skipped and anki_status is None. Defaults to True.
 
     Returns:
         dict: Search results dictionary containing:
@@ -251,8 +325,11 @@ def search_flashcards(runtime_config_dictionary: dict, query_text: str) -> dict:
             - llm_response: Response from LLM
             - extracted_nid_list: List of extracted NIDs
             - formatted_nids: NIDs formatted for Anki
-            - anki_status: Status of Anki connection
+            - anki_status: Status of Anki connection, or None if open_in_anki is False
             - llm_ranked_cards: Final ranked card list
+            - semantic_cache_hit_for: Only set on a semantic cache hit; the new query
+              that reused the result, while `query` stays the one it was computed for.
+              A hit returns similarity_top_cards_full_fat as [] and llm_prompt as None
         Returns None if an error occurs during processing.
 
     Raises:
@@ -264,12 +341,43 @@ def search_flashcards(runtime_config_dictionary: dict, query_text: str) -> dict:
         # Get query embedding
         query_embed = embedding_service.get_embedding(query_text)
 
-        # Get initial similarity matches
-        top_indices_sim, top_similarities = get_top_n_similarities_and_indices(
-            query_embed,
-            runtime_config_dictionary["embeddings"],
-            runtime_config_dictionary["top_n_vectors_from_dataframe"]
-        )
+        # Near-duplicate of an earlier query? Reuse its result and skip Cohere + LLM
+        threshold = runtime_config_dictionary.get("semantic_cache_threshold")
+        if threshold is not None:
+            cached_result = semantic_cache.get(query_embed, threshold)
+            if cached_result is not None:
+                # Keep the query the result was computed for; record which query reused it
+                logger.info(
+                    f"Semantic cache hit; reusing result for {cached_result['query']!r}"
+                )
+                cached_result["semantic_cache_hit_for"] = query_text
+                cached_result["similarity_top_cards_full_fat"] = []
+                cached_result["llm_prompt"] = None
+                cached_result["anki_status"] = None
+                if open_in_anki:
+                    cached_result["anki_status"] = check_anki_status(
+                        cached_result,
+                        in_process=runtime_config_dictionary.get("anki_in_process", True),
+                        focus=runtime_config_dictionary.get("anki_focus", False)
+                    )
+                logger.info("Search workflow completed successfully")
+                return cached_result
+
+        # Get initial similarity matches (approximate index if one was built)
+        ann_index = runtime_config_dictionary.get("ann_index")
+        if ann_index is not None:
+            top_indices_sim, top_similarities = get_top_n_from_ann_index(
+                query_embed,
+                ann_index,
+                runtime_config_dictionary["top_n_vectors_from_dataframe"]
+            )
+        else:
+            top_indices_sim, top_similarities = get_top_n_similarities_and_indices(
+                query_embed,
+                runtime_config_dictionary["embeddings"],
+                runtime_config_dictionary["top_n_vectors_from_dataframe"],
+                embeddings_normalized=runtime_config_dictionary.get("embeddings_normalized", False)
+            )
 
         # Prepare initial card listing
         similarity_top_cards_full_fat = prepare_top_cards_list(
@@ -327,9 +435,18 @@ def search_flashcards(runtime_config_dictionary: dict, query_text: str) -> dict:
         )
 
         # 3️⃣  Assign value to "anki_status" key to fill placeholder
-        per_search_result_dictionary["anki_status"] = check_anki_status(
-            per_search_result_dictionary
-        )
+        if open_in_anki:
+            per_search_result_dictionary["anki_status"] = check_anki_status(
+                per_search_result_dictionary,
+                in_process=runtime_config_dictionary.get("anki_in_process", True),
+                focus=runtime_config_dictionary.get("anki_focus", False)
+            )
+
+        # Only cache results the LLM actually ranked
+        if threshold is not None and extracted_nids:
+            semantic_cache.set(query_embed, {
+                field: per_search_result_dictionary[field] for field in _SEMANTIC_CACHE_FIELDS
+            })
 
         logger.info("Search workflow completed successfully")
         return per_search_result_dictionary
@@ -337,3 +454,68 @@ def search_flashcards(runtime_config_dictionary: dict, query_text: str) -> dict:
         logger.exception(f"Error in search_flashcards: {e}")
         return None
 
+
+async def search_flashcards_async(
+    runtime_config_dictionary: dict, query_text: str, open_in_anki: bool = True
+) -> dict:
+    """Runs `search_flashcards` in a worker thread so it doesn't block the event loop.
+
+    The workflow is dominated by blocking HTTP calls (embedding, Cohere, DeepSeek,
+    AnkiConnect), so offloading it lets an async caller keep serving other work.
+
+    Args:
+        runtime_config_dictionary (dict): Configuration dictionary, as for
+            `search_flashcards`.
+        query_text (str): The search query text.
+        open_in_anki (bool, optional): Open the results in the Anki browser.
+            Defaults to True.
+
+    Returns:
+        dict: Search results dictionary, or None if an error occurs.
+    """
+    return await asyncio.to_thread(
+        search_flashcards, runtime_config_dictionary, query_text, open_in_anki
+    )
+
+
+async def search_flashcards_batch(
+    runtime_config_dictionary: dict,
+    query_texts: List[str],
+    max_concurrency: int = 4
+) -> List[Optional[dict]]:
+    """Runs several flashcard searches concurrently.
+
+    All query embeddings are fetched up front in one batched request, which
+    warms the embedding cache for the individual searches. At most
+    `max_concurrency` searches are in flight at once. Results are not opened in
+    Anki, since each search would replace the browser view of the one before;
+    pass a result to `check_anki_status` to open it.
+
+    Args:
+        runtime_config_dictionary (dict): Configuration dictionary, as for
+            `search_flashcards`.
+        query_texts (List[str]): The search queries.
+        max_concurrency (int): Maximum number of simultaneous searches. Defaults to 4.
+
+    Returns:
+        List[Optional[dict]]: One search results dictionary (or None on error)
+            per query, in input order, each with anki_status None.
+    """
+    if not query_texts:
+        return []
+
+    try:
+        await asyncio.to_thread(embedding_service.get_embeddings, list(query_texts))
+    except Exception as e:
+        # Each search will retry its own embedding and report failures itself
+        logger.warning(f"Batched embedding prefetch failed: {e}")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(query_text: str) -> Optional[dict]:
+        async with semaphore:
+            return await search_flashcards_async(
+                runtime_config_dictionary, query_text, open_in_anki=False
+            )
+
+    return await asyncio.gather(*(run_one(query_text) for query_text in query_texts))
@@ -5,17 +5,46 @@ import numpy as np
 import pandas as pd
 import h5py
 from loguru import logger
+from .flow import SIMSIMD_AVAILABLE
 
-def load_from_hdf5(h5_file):
+# hnswlib enables the optional approximate top-N index
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+def _memory_map_dataset(h5_file, dataset):
+    """Memory-map a contiguous, uncompressed HDF5 dataset straight from the file.
+
+    Args:
+        h5_file (str): Path to the HDF5 file that holds `dataset`.
+        dataset (h5py.Dataset): The dataset to map.
+
+    Returns:
+        numpy.memmap or None: Read-only view of the dataset, or None if it is
+            chunked/compressed (or not yet allocated) and so cannot be mapped.
+    """
+    offset = dataset.id.get_offset()
+    if dataset.chunks is not None or dataset.compression is not None or offset is None:
+        return None
+    return np.memmap(h5_file, mode="r", dtype=dataset.dtype, shape=dataset.shape, offset=offset)
+
+
+def load_from_hdf5(h5_file, memory_map=False):
     """Load flash-card data generated by `generate_hdf5_file.py`.
 
     Args:
         h5_file (str): Path to the HDF5 file containing flashcard data.
+        memory_map (bool): Map the embeddings from the file instead of reading them
+            into RAM, so pages load on demand and are shared between processes.
+            Falls back to a normal read if the dataset is chunked or compressed.
 
     Returns:
         tuple: A tuple containing:
             - pandas.DataFrame: DataFrame containing flashcard data
             - numpy.ndarray: Matrix of embeddings where each row corresponds to a flashcard
+              (a read-only numpy.memmap when memory-mapped)
 
     Raises:
         KeyError: If required HDF5 structure is missing or nid column not found
@@ -41,7 +70,15 @@ def load_from_hdf5(h5_file):
                 raise KeyError(msg)
 
             # 1️⃣  Embeddings
-            embeddings_np = f["embeddings"][:].astype(np.float32)
+            embeddings_np = None
+            if memory_map:
+                embeddings_np = _memory_map_dataset(h5_file, f["embeddings"])
+                if embeddings_np is None:
+                    logger.warning("Embeddings dataset is chunked or compressed; loading into RAM instead")
+                else:
+                    logger.info("Memory-mapped embeddings from HDF5 file")
+            if embeddings_np is None:
+                embeddings_np = f["embeddings"][:].astype(np.float32)
 
             # 2️⃣  Reconstruct DataFrame
             df_data = {}
@@ -84,6 +121,55 @@ def load_from_hdf5(h5_file):
         logger.exception(f"Failed to load HDF5 file: {e}")
         raise
 
+def rows_are_unit_norm(embeddings, sample_size=32, tolerance=1e-3):
+    """Check whether a random sample of embedding rows already has unit L2 norm.
+
+    Most embedding models (Qwen3-Embedding included) return normalised vectors, in
+    which case cosine similarity is a plain dot product and no division is needed.
+
+    Args:
+        embeddings (numpy.ndarray): Matrix of embeddings, one row per flashcard
+        sample_size (int): Number of rows to check
+        tolerance (float): Allowed deviation of each sampled norm from 1.0
+
+    Returns:
+        bool: True if every sampled row is unit length within `tolerance`
+    """
+    num_rows = embeddings.shape[0]
+    if num_rows == 0:
+        return False
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(num_rows, size=min(sample_size, num_rows), replace=False))
+    sample = np.asarray(embeddings[rows], dtype=np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->i", sample, sample))
+    return bool(np.all(np.abs(norms - 1.0) < tolerance))
+
+def build_ann_index(embeddings, top_n_sim):
+    """Build an HNSW cosine index over the embedding matrix.
+
+    Args:
+        embeddings (numpy.ndarray): Matrix of embeddings, one row per flashcard
+        top_n_sim (int): Number of neighbours queries will ask for; sets the
+            search breadth (ef)
+
+    Returns:
+        hnswlib.Index: Index whose labels are row positions in `embeddings`
+
+    Raises:
+        ImportError: If hnswlib is not installed
+    """
+    if not HNSWLIB_AVAILABLE:
+        raise ImportError("hnswlib is required for the ANN index: pip install hnswlib")
+
+    num_rows, dim = embeddings.shape
+    logger.info(f"Building HNSW index over {num_rows} embeddings")
+    index = hnswlib.Index(space="cosine", dim=dim)
+    index.init_index(max_elements=num_rows, M=32, ef_construction=200)
+    index.add_items(np.asarray(embeddings, dtype=np.float32), np.arange(num_rows))
+    index.set_ef(max(64, top_n_sim * 2))
+    logger.info("HNSW index ready")
+    return index
+
 def load_searcher_context(config_path):
     """Load flash-card data, embeddings and search-related settings.
 
@@ -93,11 +179,23 @@ def load_searcher_context(config_path):
     Returns:
         dict: A dictionary containing:
             - dataframe (pandas.DataFrame): Flashcard data
-            - embeddings (numpy.ndarray): Matrix of embeddings
+            - embeddings (numpy.ndarray): Matrix of row-normalised embeddings, stored
+              as `myy_settings.embedding_dtype` ("auto" picks float16 when SimSIMD is
+              installed and float32 otherwise);
+              with `myy_settings.memory_map_embeddings` it is instead a read-only
+              numpy.memmap of the rows as stored in the file
+            - embeddings_normalized (bool): True if rows are unit length (as stored,
+              or normalised at load time)
+            - ann_index (hnswlib.Index or None): Approximate top-N index, built only
+              when `myy_settings.use_ann_index` is true
             - top_n_vectors_from_dataframe (int): Number of top vectors to retrieve
             - in_prompt_number (int): Number to use in prompt template
             - personal_LLM_prompt (str): Template for LLM prompt
             - num_wanted_back_from_cohere (int): Number of results to request from Cohere
+            - semantic_cache_threshold (float or None): Query similarity needed to reuse a
+              cached search result; None disables the semantic cache
+            - anki_in_process (bool): Call anki_script in-process instead of spawning it
+            - anki_focus (bool): Bring Anki to the front after opening the results
 
     Raises:
         json.JSONDecodeError: If config file is not valid JSON
@@ -108,15 +206,52 @@ def load_searcher_context(config_path):
     with open(config_path, "r") as f:
         config = json.load(f)
 
-    dataframe, embeddings = load_from_hdf5(config["myy_hdf5_location"]["h5_file"])
+    dataframe, embeddings = load_from_hdf5(
+        config["myy_hdf5_location"]["h5_file"],
+        memory_map=config["myy_settings"].get("memory_map_embeddings", False)
+    )
+    memory_mapped = isinstance(embeddings, np.memmap)
+
+    # Already unit vectors? Then there is nothing to divide, mapped or not
+    prenormalized = rows_are_unit_norm(embeddings)
+    if prenormalized:
+        logger.info("Embeddings are already unit-normalised; skipping row normalisation")
+
+    # Normalise rows once so each query's cosine similarity is a single GEMV.
+    # A memory-mapped matrix is read-only and stays as stored; queries then
+    # normalise it block by block.
+    if not memory_mapped and not prenormalized:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings /= norms
+
+    # Optional approximate index, built from the full-precision rows
+    ann_index = None
+    if config["myy_settings"].get("use_ann_index", False):
+        ann_index = build_ann_index(
+            embeddings, config["myy_settings"]["top_n_vectors_from_dataframe"]
+        )
+
+    # float16 halves per-query memory traffic, but only SimSIMD has native f16
+    # kernels; the Numba and NumPy paths are fastest on float32
+    if not memory_mapped:
+        embedding_dtype = config["myy_settings"].get("embedding_dtype", "auto")
+        if embedding_dtype == "auto":
+            embedding_dtype = "float16" if SIMSIMD_AVAILABLE else "float32"
+        embeddings = embeddings.astype(np.dtype(embedding_dtype), copy=False)
 
     runtime_config_dictionary = {
         "dataframe": dataframe,
         "embeddings": embeddings,
+        "embeddings_normalized": prenormalized or not memory_mapped,
+        "ann_index": ann_index,
         "top_n_vectors_from_dataframe": config["myy_settings"]["top_n_vectors_from_dataframe"],
         "in_prompt_number": config["myy_settings"]["in_prompt_number"],
         "personal_LLM_prompt": config["myy_settings"]["personal_LLM_prompt"],
         "num_wanted_back_from_cohere": config["myy_settings"]["num_wanted_back_from_cohere"],
+        "semantic_cache_threshold": config["myy_settings"].get("semantic_cache_threshold"),
+        "anki_in_process": config["myy_settings"].get("anki_in_process", True),
+        "anki_focus": config["myy_settings"].get("anki_focus", False),
     }
     logger.info("Flash-card context ready")
     return runtime_config_dictionary 
\ No newline at end of file
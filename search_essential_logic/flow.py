@@ -1,14 +1,92 @@
+import functools
 import numpy as np
 from loguru import logger
 from .myy_api import deepseek_service
 
-def get_top_n_similarities_and_indices(query_embed, embeddings, top_n_sim):
+# SimSIMD fuses normalisation and dot product, so no normalised copy of the matrix is built
+try:
+    import simsimd as simd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+@functools.lru_cache(maxsize=1)
+def _numba_kernel():
+    """Next choice when SimSIMD is missing: Numba's parallel kernel (float32 rows only).
+
+    Importing flow_numba compiles the kernel, so it is only done the first time
+    the non-SimSIMD path needs it.
+
+    Returns:
+        callable or None: `numba_cosine_scores`, or None if Numba is unavailable.
+    """
+    from .flow_numba import NUMBA_AVAILABLE, numba_cosine_scores
+    return numba_cosine_scores if NUMBA_AVAILABLE else None
+
+# Target bytes per float32 row block (~1000 rows at D=4096): large enough that the
+# per-block Python work is negligible, small enough to bound the float32 copy made
+# of float16 or memory-mapped rows
+_TILE_BYTES = 16 << 20
+
+def _tiled_top_n(matrix, query_normed, top_n, normalize_rows=False):
+    """Finds the top-N rows by similarity to `query_normed`, one block at a time.
+
+    Each block is upcast to float32 (and row-normalised if requested) on its own and
+    only rows that beat the current N-th best score are kept, so neither a full-size
+    float32 copy of `matrix` nor the full similarity vector is ever allocated. A
+    memory-mapped matrix is only paged in block by block.
+
+    Args:
+        matrix: Embedding matrix (any float dtype, may be a memmap)
+        query_normed: Unit-length float32 query vector
+        top_n: Number of top matches to return
+        normalize_rows: Divide each score by its row's L2 norm
+
+    Returns:
+        tuple: (top_indices, top_scores) sorted by descending score
+    """
+    num_rows, dim = matrix.shape
+    top_n = min(top_n, num_rows)
+    tile_rows = max(1, _TILE_BYTES // (dim * 4))
+
+    best_indices = np.empty(0, dtype=np.intp)
+    best_scores = np.empty(0, dtype=np.float32)
+    threshold = -np.inf
+
+    for start in range(0, num_rows, tile_rows):
+        block = np.asarray(matrix[start:start + tile_rows], dtype=np.float32)
+        block_scores = block @ query_normed
+        if normalize_rows:
+            norms = np.sqrt(np.einsum("ij,ij->i", block, block))
+            norms[norms == 0] = 1.0
+            block_scores /= norms
+
+        # Once N candidates are held, only rows beating the N-th best matter
+        keep = np.flatnonzero(block_scores > threshold)
+        if keep.size == 0:
+            continue
+        best_scores = np.concatenate((best_scores, block_scores[keep]))
+        best_indices = np.concatenate((best_indices, keep + start))
+
+        if best_scores.size > top_n:
+            survivors = np.argpartition(best_scores, -top_n)[-top_n:]
+            best_scores = best_scores[survivors]
+            best_indices = best_indices[survivors]
+        if best_scores.size == top_n:
+            threshold = best_scores.min()
+
+    order = np.argsort(best_scores)[::-1]
+    return best_indices[order], best_scores[order]
+
+def get_top_n_similarities_and_indices(query_embed, embeddings, top_n_sim, embeddings_normalized=False):
     """Computes similarities and returns top indices in one operation.
     
     Args:
         query_embed: The query embedding vector to compare against
         embeddings: Matrix of embeddings to compare with query
         top_n_sim: Number of top matches to return
+        embeddings_normalized: True if the rows of `embeddings` are already
+                               unit length (see `load_searcher_context`)
         
     Returns:
         tuple: (top_indices_sim, top_similarities) containing arrays of the 
@@ -20,7 +98,9 @@ def get_top_n_similarities_and_indices(query_embed, embeddings, top_n_sim):
     logger.debug(f"Computing top {top_n_sim} matches")
     
     query_vector = np.asarray(query_embed, dtype=np.float32).reshape(-1)
-    embeddings_matrix = np.asarray(embeddings, dtype=np.float32)
+    embeddings_matrix = np.asarray(embeddings)
+    if embeddings_matrix.dtype not in (np.float16, np.float32):
+        embeddings_matrix = embeddings_matrix.astype(np.float32)
     
     # Check dimensions match
     if query_vector.shape[0] != embeddings_matrix.shape[1]:
@@ -29,23 +109,70 @@ def get_top_n_similarities_and_indices(query_embed, embeddings, top_n_sim):
             f"but embeddings matrix expects {embeddings_matrix.shape[1]} dimensions"
         )
     
-    # Normalize query
-    q_norm = np.linalg.norm(query_vector)
-    query_normed = query_vector / q_norm if q_norm != 0 else query_vector
-    
-    # Normalize embeddings row-wise
-    emb_norms = np.linalg.norm(embeddings_matrix, axis=1, keepdims=True)
-    emb_norms[emb_norms == 0] = 1.0
-    emb_normed = embeddings_matrix / emb_norms
-    
-    # Compute similarities and get top matches in one pass
-    similarity_scores = emb_normed @ query_normed
+    if SIMSIMD_AVAILABLE:
+        # Cosine distance → similarity, computed row-by-row without intermediates
+        # SimSIMD needs matching dtypes; it has native f16 kernels
+        query_cast = query_vector.astype(embeddings_matrix.dtype, copy=False)
+        cosine_distances = simd.cdist(query_cast[None, :], embeddings_matrix, metric="cosine")
+        similarity_scores = 1.0 - np.asarray(cosine_distances).ravel()
+
+        top_indices_sim = np.argpartition(similarity_scores, -top_n_sim)[-top_n_sim:]
+        top_indices_sim = top_indices_sim[np.argsort(similarity_scores[top_indices_sim])[::-1]]
+        top_similarities = similarity_scores[top_indices_sim]
+    else:
+        # Normalize query
+        q_norm = float(np.sqrt(np.vdot(query_vector, query_vector)))
+        query_normed = query_vector / q_norm if q_norm != 0 else query_vector
+
+        # In-RAM unit float32 rows: a single GEMV reads the matrix once, and
+        # blocking it only adds per-block Python work
+        is_float32 = embeddings_matrix.dtype == np.float32
+        use_gemv = (
+            is_float32 and embeddings_normalized and not isinstance(embeddings_matrix, np.memmap)
+        )
+        numba_kernel = _numba_kernel() if is_float32 and not use_gemv else None
+        if use_gemv:
+            similarity_scores = embeddings_matrix @ query_normed
+            top_indices_sim = np.argpartition(similarity_scores, -top_n_sim)[-top_n_sim:]
+            top_indices_sim = top_indices_sim[np.argsort(similarity_scores[top_indices_sim])[::-1]]
+            top_similarities = similarity_scores[top_indices_sim]
+        elif numba_kernel is not None:
+            similarity_scores = numba_kernel(
+                embeddings_matrix, query_normed, normalize_rows=not embeddings_normalized
+            )
+            top_indices_sim = np.argpartition(similarity_scores, -top_n_sim)[-top_n_sim:]
+            top_indices_sim = top_indices_sim[np.argsort(similarity_scores[top_indices_sim])[::-1]]
+            top_similarities = similarity_scores[top_indices_sim]
+        else:
+            # Rows are normalised block by block unless that was done once at load time
+            top_indices_sim, top_similarities = _tiled_top_n(
+                embeddings_matrix, query_normed, top_n_sim, normalize_rows=not embeddings_normalized
+            )
     logger.info("Completed cosine similarity calculations for all embeddings")
     
-    top_indices_sim = np.argpartition(similarity_scores, -top_n_sim)[-top_n_sim:]
-    top_indices_sim = top_indices_sim[np.argsort(similarity_scores[top_indices_sim])[::-1]]
-    top_similarities = similarity_scores[top_indices_sim]
-    
+    return top_indices_sim, top_similarities
+
+
+def get_top_n_from_ann_index(query_embed, ann_index, top_n_sim):
+    """Approximate counterpart of `get_top_n_similarities_and_indices` using an HNSW index.
+
+    Args:
+        query_embed: The query embedding vector
+        ann_index: hnswlib cosine index built by `build_ann_index`
+        top_n_sim: Number of top matches to return
+
+    Returns:
+        tuple: (top_indices_sim, top_similarities), sorted by descending similarity
+    """
+    logger.debug(f"Querying ANN index for top {top_n_sim} matches")
+
+    query_vector = np.asarray(query_embed, dtype=np.float32).reshape(1, -1)
+    labels, distances = ann_index.knn_query(query_vector, k=min(top_n_sim, ann_index.get_current_count()))
+    logger.info("Completed cosine similarity calculations via ANN index")
+
+    # hnswlib returns neighbours nearest-first; cosine distance = 1 - similarity
+    top_indices_sim = labels[0].astype(np.intp)
+    top_similarities = 1.0 - distances[0]
     return top_indices_sim, top_similarities
 
 
@@ -60,15 +187,22 @@ def prepare_top_cards_list(top_indices_sim, top_similarities, dataframe):
     Returns:
         list: List of dictionaries containing ranked card information
     """
-    similarity_top_cards_full_fat = []
-    for cosine_similarity_rank, (top_index_sim, similarity) in enumerate(zip(top_indices_sim, top_similarities), 1):
-        row = dataframe.iloc[top_index_sim]
-        similarity_top_cards_full_fat.append({
+    # One positional gather instead of a per-row .iloc lookup
+    top_rows = dataframe.iloc[np.asarray(top_indices_sim)]
+    nids = top_rows["nid"].astype(str).tolist()
+    contents = top_rows["flashcard_content"].tolist()
+    similarities = np.asarray(top_similarities, dtype=np.float64).tolist()
+
+    similarity_top_cards_full_fat = [
+        {
             "cosine_similarity_rank": cosine_similarity_rank,
-            "nid": str(row["nid"]),
-            "cosine_similarity_score": float(similarity),
-            "content": row["flashcard_content"],
-        })
+            "nid": nid,
+            "cosine_similarity_score": similarity,
+            "content": content,
+        }
+        for cosine_similarity_rank, (nid, similarity, content)
+        in enumerate(zip(nids, similarities, contents), 1)
+    ]
     return similarity_top_cards_full_fat
 
 
@@ -84,14 +218,16 @@ def format_flashcard_results_for_llm(header_that_is_prompt, query_text, reranked
     Returns:
         str: Formatted string containing flashcard results for LLM processing.
     """
-    output_to_llm = f"# Prompt\n{header_that_is_prompt}\n\n"
-    output_to_llm += f"## Query\n{query_text}\n\n"
-    output_to_llm += "## Flashcard Pool\n"
-    for full_dictionary_single_card in reranked_cards:
-        nid = full_dictionary_single_card["nid"]
-        content = full_dictionary_single_card["content"]
-        output_to_llm += f"- [nid:{nid}] {content}\n"
-    return output_to_llm
+    # Collect pieces and join once; repeated += would copy the growing prompt each time
+    parts = [
+        f"# Prompt\n{header_that_is_prompt}\n\n",
+        f"## Query\n{query_text}\n\n",
+        "## Flashcard Pool\n",
+    ]
+    parts.extend(
+        f"- [nid:{card['nid']}] {card['content']}\n" for card in reranked_cards
+    )
+    return "".join(parts)
 
 def chat_with_final_llm(llm_prompt):
     """Sends text to DeepSeek's chat API and returns the response.
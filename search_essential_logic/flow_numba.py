@@ -0,0 +1,56 @@
+import numpy as np
+from loguru import logger
+
+# Numba is optional; it gives a multicore kernel when SimSIMD isn't installed
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_scores_kernel(embeddings, query_normed, normalize_rows, out):
+        for i in prange(embeddings.shape[0]):
+            dot = 0.0
+            sq_norm = 0.0
+            for j in range(embeddings.shape[1]):
+                value = embeddings[i, j]
+                dot += value * query_normed[j]
+                if normalize_rows:
+                    sq_norm += value * value
+            if normalize_rows and sq_norm > 0.0:
+                dot /= np.sqrt(sq_norm)
+            out[i] = dot
+
+
+def numba_cosine_scores(embeddings, query_normed, normalize_rows=False):
+    """Computes row-wise similarity to `query_normed` with a parallel Numba kernel.
+
+    Args:
+        embeddings: float32 embedding matrix
+        query_normed: Unit-length float32 query vector
+        normalize_rows: Divide each score by its row's L2 norm
+
+    Returns:
+        numpy.ndarray: float32 vector of similarity scores
+
+    Raises:
+        RuntimeError: If Numba is not installed
+    """
+    if not NUMBA_AVAILABLE:
+        raise RuntimeError("Numba is not installed: pip install numba")
+    scores = np.empty(embeddings.shape[0], dtype=np.float32)
+    _cosine_scores_kernel(embeddings, query_normed, normalize_rows, scores)
+    return scores
+
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from cache) at import so a broken toolchain is caught here
+    # and flow falls back to NumPy instead of failing mid-search
+    try:
+        numba_cosine_scores(np.ones((2, 4), dtype=np.float32), np.ones(4, dtype=np.float32))
+    except Exception as e:
+        logger.warning(f"Numba kernel warm-up failed; falling back to NumPy: {e}")
+        NUMBA_AVAILABLE = False
@@ -4,10 +4,40 @@ import os
 from dotenv import load_dotenv
 import numpy as np
 from typing import List, Dict, Any
-import requests
+import httpx
 import time
 from huggingface_hub import InferenceClient
 import json
+from .ttl_cache import TTLCache
+
+_DEFAULT_EMBEDDING_SETTINGS = {"use_instruction": False, "instruction": None}
+
+def _load_embedding_settings(config_path: str = "search_essential_logic/config.json") -> Dict[str, Any]:
+    """Read and validate the embedding settings from config.json.
+
+    Falls back to no instruction prefix if the file or required keys are missing,
+    so problems surface as one warning at import instead of at the first query.
+    """
+    try:
+        with open(config_path, "r") as f:
+            settings = json.load(f)["embedding_settings"]
+        return {key: settings[key] for key in _DEFAULT_EMBEDDING_SETTINGS}
+    except Exception as e:
+        logger.warning(f"Failed to load instruction settings from config: {e}")
+        return dict(_DEFAULT_EMBEDDING_SETTINGS)
+
+_EMBEDDING_SETTINGS = _load_embedding_settings()
+
+def _make_http_client(**kwargs) -> httpx.Client:
+    """Create a pooled httpx client, using HTTP/2 when the `h2` package is installed.
+
+    Held at service-instance scope so every call reuses the same TLS connection.
+    """
+    try:
+        return httpx.Client(http2=True, **kwargs)
+    except ImportError:
+        logger.warning("h2 not installed; falling back to HTTP/1.1 keep-alive")
+        return httpx.Client(**kwargs)
 
 class QwenEmbeddingService:
     """Service for generating text embeddings using Qwen3-Embedding-8B model via Nebius AI.
@@ -24,53 +54,74 @@ class QwenEmbeddingService:
         
         self.client = OpenAI(
             base_url="https://api.studio.nebius.com/v1/",
-            api_key=self.api_key
+            api_key=self.api_key,
+            http_client=_make_http_client()
         )
         self.model = "Qwen/Qwen3-Embedding-8B"
         
-        # Load instruction settings from config
-        try:
-            with open("search_essential_logic/config.json", "r") as f:
-                config = json.load(f)
-                self.use_instruction = config["embedding_settings"]["use_instruction"]
-                self.instruction = config["embedding_settings"]["instruction"]
-        except Exception as e:
-            logger.warning(f"Failed to load instruction settings from config: {e}")
-            self.use_instruction = False
-            self.instruction = None
+        # Instruction settings come from config.json, read once at import
+        self.use_instruction = _EMBEDDING_SETTINGS["use_instruction"]
+        self.instruction = _EMBEDDING_SETTINGS["instruction"]
+
+        # Repeated queries skip the API; ~16 KB per 4096-dim vector
+        self._cache = TTLCache(max_items=1024, ttl_sec=3600)
     
     def get_embedding(self, text: str) -> np.ndarray:
         """Get embedding vector for input text."""
-        try:
-            logger.info("embed api call")
-            start = time.perf_counter()
+        return self.get_embeddings([text])[0]
 
-            # Add instruction if enabled
-            if self.use_instruction and self.instruction:
-                text = f"{self.instruction}\n\n{text}"
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embedding vectors for several texts in a single API request.
 
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
+        Args:
+            texts: Input strings to embed
 
-            duration = time.perf_counter() - start
-            logger.info(f"embed api answer (took {duration:.2f}s)")
-            
-            # Extract embedding from response and convert to numpy array
-            embedding = np.array(response.data[0].embedding, dtype=np.float32)
-                
-            return embedding
-        except Exception as e:
-            logger.exception(f"Error getting embedding: {e}")
-            raise
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), D), one row per input
+        """
+        cache_keys = [(self.model, self.use_instruction, text) for text in texts]
+        rows: List[Any] = [self._cache.get(key) for key in cache_keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if len(missing) < len(texts):
+            logger.info("embed cache hit")
+
+        if missing:
+            try:
+                logger.info("embed api call")
+                start = time.perf_counter()
+
+                # Add instruction if enabled
+                inputs = [texts[i] for i in missing]
+                if self.use_instruction and self.instruction:
+                    inputs = [f"{self.instruction}\n\n{text}" for text in inputs]
+
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=inputs
+                )
+
+                duration = time.perf_counter() - start
+                logger.info(f"embed api answer (took {duration:.2f}s)")
+
+                # Extract embeddings from response (ordered by input index) into numpy arrays
+                for i, data in zip(missing, sorted(response.data, key=lambda d: d.index)):
+                    embedding = np.array(data.embedding, dtype=np.float32)
+                    self._cache.set(cache_keys[i], embedding)
+                    rows[i] = embedding
+            except Exception as e:
+                logger.exception(f"Error getting embedding: {e}")
+                raise
+
+        # np.stack copies, so cached vectors are never handed out directly
+        return np.stack(rows)
 
 class DeepSeekService:
     def __init__(self):
         load_dotenv()
         self.client = OpenAI(
             api_key=os.getenv("DEEPSEEK_API_KEY"),
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            http_client=_make_http_client()
         )
     
     def chat_completion(self, prompt: str, model: str = "deepseek-chat") -> str:
@@ -106,11 +157,13 @@ class CohereService:
             raise ValueError("COHERE_API_KEY not found in environment variables")
         
         self.base_url = "https://api.cohere.ai/v2/rerank"
+        self.model = "rerank-v3.5"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "X-Client-Name": "flashcard-search"
         }
+        self._client = _make_http_client(headers=self.headers, timeout=30.0)
 
     def rerank(self, query: str, documents: List[str], top_n: int = None) -> Dict[str, Any]:
         """Call Cohere's rerank API.
@@ -124,11 +177,11 @@ class CohereService:
             Dict containing reranking results
             
         Raises:
-            requests.exceptions.RequestException: If API call fails
+            httpx.HTTPError: If API call fails
         """
         try:
             payload = {
-                "model": "rerank-v3.5",
+                "model": self.model,
                 "query": query,
                 "documents": documents,
             }
@@ -137,7 +190,7 @@ class CohereService:
 
             start = time.perf_counter()
             logger.info(f"Calling Cohere rerank API with {len(documents)} documents")
-            response = requests.post(self.base_url, headers=self.headers, json=payload)
+            response = self._client.post(self.base_url, json=payload)
             response.raise_for_status()
             
             duration = time.perf_counter() - start
@@ -145,7 +198,7 @@ class CohereService:
 
             return response.json()
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.exception(f"Cohere API call failed: {e}")
             raise
 
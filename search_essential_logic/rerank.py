@@ -1,6 +1,19 @@
 from typing import List, Dict, Any, Tuple
+import os
+import sqlite3
 from loguru import logger
 from .myy_api import cohere_service
+from .scorer_cache import ScorerCache
+from .ttl_cache import TTLCache
+import copy
+
+# Cohere scores per (model, query, nid, card text), persisted across runs in the project root
+scorer_cache = ScorerCache(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rerank_scores.sqlite"
+))
+
+# Whole reranked lists for an exact repeat of (query, candidate set)
+rerank_result_cache = TTLCache(max_items=4096, ttl_sec=1800)
 
 def prepare_for_cohere(similarity_top_cards_full_fat: List[Dict]) -> Tuple[List[str], Dict[int, Dict]]:
     """Prepare data for Cohere reranking.
@@ -82,18 +95,60 @@ def rerank_workflow(
             logger.warning("No cards provided for reranking")
             return []
             
+        # Exact repeat of an earlier rerank? Skip straight to its result
+        model = cohere_service.model
+        nids = [card["nid"] for card in similarity_top_cards_full_fat]
+        result_key = (model, query, tuple(nids), num_wanted_back_from_cohere)
+        cached_result = rerank_result_cache.get(result_key)
+        if cached_result is not None:
+            logger.info(f"Reranking workflow served from cache with {len(cached_result)} results")
+            return copy.deepcopy(cached_result)
+
         # Prepare data for Cohere
         content_list, pre_rank_index = prepare_for_cohere(similarity_top_cards_full_fat)
-        
-        # Call Cohere API
-        cohere_response = cohere_service.rerank(
-            query=query,
-            documents=content_list,
-            top_n=num_wanted_back_from_cohere if num_wanted_back_from_cohere else None
-        )
+
+        # Reuse scores already known for this (model, query, card text); the cache
+        # is an optimisation, so a broken database only costs a full rerank
+        try:
+            cached_scores = scorer_cache.get_many(model, query, list(zip(nids, content_list)))
+        except sqlite3.Error as e:
+            logger.warning(f"Reranker score cache unavailable, scoring every card: {e}")
+            cached_scores = {}
+        scores = {i: cached_scores[nid] for i, nid in enumerate(nids) if nid in cached_scores}
+        uncached = [i for i in range(len(nids)) if i not in scores]
+        logger.debug(f"Reranker score cache: {len(scores)} cached, {len(uncached)} to score")
+
+        # Call Cohere API for the remaining cards only; all scores are kept for the cache
+        if uncached:
+            cohere_response = cohere_service.rerank(
+                query=query,
+                documents=[content_list[i] for i in uncached]
+            )
+            fresh_scores = []
+            for cohere_result in cohere_response["results"]:
+                original_index = uncached[cohere_result["index"]]
+                scores[original_index] = cohere_result["relevance_score"]
+                fresh_scores.append((
+                    nids[original_index],
+                    content_list[original_index],
+                    cohere_result["relevance_score"],
+                ))
+            try:
+                scorer_cache.set_many(model, query, fresh_scores)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not store reranker scores: {e}")
+
+        # Merge into a Cohere-shaped response sorted by relevance
+        ranked_indices = sorted(scores, key=scores.get, reverse=True)
+        if num_wanted_back_from_cohere:
+            ranked_indices = ranked_indices[:num_wanted_back_from_cohere]
+        merged_response = {
+            "results": [{"index": i, "relevance_score": scores[i]} for i in ranked_indices]
+        }
         
         # Reconstruct results
-        reranked_cards = reconstruct_from_cohere(cohere_response, pre_rank_index)
+        reranked_cards = reconstruct_from_cohere(merged_response, pre_rank_index)
+        rerank_result_cache.set(result_key, copy.deepcopy(reranked_cards))
         
         logger.info(f"Reranking workflow completed successfully with {len(reranked_cards)} results")
         return reranked_cards
@@ -0,0 +1,120 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from loguru import logger
+
+
+class ScorerCache:
+    """SQLite-backed store of reranker scores keyed by (model, query, nid, content hash).
+
+    Scores for a query/card pair do not depend on the other cards sent with
+    them, so a repeated pair can be answered from disk instead of the reranker
+    API. The model name and a hash of the card text are part of the key, so
+    swapping models or editing a card never returns stale scores. Entries expire after `ttl_sec`, and the oldest rows are
+    pruned once the table grows past `max_rows`. The database is opened on
+    first use and may be shared between threads.
+    """
+    def __init__(
+        self,
+        path: str = "rerank_scores.sqlite",
+        ttl_sec: float = 30 * 24 * 3600,
+        max_rows: int = 200_000,
+    ):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.max_rows = max_rows
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            logger.debug(f"Opening reranker score cache at {self.path}")
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(scores)")}
+            if columns and not {"stored_at", "content_hash"} <= columns:
+                # Written by an older layout; it is only a cache, so start over
+                conn.execute("DROP TABLE scores")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, nid TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, score REAL NOT NULL, stored_at REAL NOT NULL, "
+                "PRIMARY KEY (model, query, nid, content_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS scores_stored_at ON scores (stored_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        return hashlib.blake2b(str(content).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_many(self, model: str, query: str, cards: List[Tuple[str, str]]) -> Dict[str, float]:
+        """Return the cached, unexpired score for every card whose text is unchanged.
+
+        Args:
+            model: Reranker model name
+            query: Search query string
+            cards: (nid, content) pairs to look up
+
+        Returns:
+            Dict mapping each cached nid to its score; missing nids are omitted
+        """
+        if not cards:
+            return {}
+        wanted = {nid: self._content_hash(content) for nid, content in cards}
+        nids = list(wanted)
+        found = {}
+        cutoff = time.time() - self.ttl_sec
+        with self._lock:
+            conn = self._connection()
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(nids), 500):
+                chunk = nids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT nid, content_hash, score FROM scores WHERE model = ? AND query = ? "
+                    f"AND stored_at >= ? AND nid IN ({placeholders})",
+                    (model, query, cutoff, *chunk),
+                )
+                found.update(
+                    (nid, score) for nid, content_hash, score in rows
+                    if wanted[nid] == content_hash
+                )
+        return found
+
+    def set_many(self, model: str, query: str, scores: Iterable[Tuple[str, str, float]]) -> None:
+        """Store (nid, content, score) triples, replacing any existing entries, then drop
+        expired rows and the oldest rows beyond `max_rows`.
+
+        Args:
+            model: Reranker model name
+            query: Search query string
+            scores: Iterable of (nid, content, score) triples
+        """
+        now = time.time()
+        rows = [
+            (model, query, nid, self._content_hash(content), float(score), now)
+            for nid, content, score in scores
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores "
+                "(model, query, nid, content_hash, score, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("DELETE FROM scores WHERE stored_at < ?", (now - self.ttl_sec,))
+            (row_count,) = conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+            if row_count > self.max_rows:
+                conn.execute(
+                    "DELETE FROM scores WHERE rowid IN "
+                    "(SELECT rowid FROM scores ORDER BY stored_at LIMIT ?)",
+                    (row_count - self.max_rows,),
+                )
+            conn.commit()
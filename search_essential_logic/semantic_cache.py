@@ -0,0 +1,68 @@
+import copy
+import threading
+from typing import Any, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """FIFO cache of search results keyed by query embedding.
+
+    A lookup matches the most similar stored query embedding, so paraphrased
+    queries can reuse a prior result. Embeddings are kept unit-normalised in a
+    preallocated ring buffer, which makes each lookup one matrix-vector product.
+    Safe to share between threads.
+    """
+    def __init__(self, max_items: int = 512):
+        self.max_items = max_items
+        self._vectors: Optional[np.ndarray] = None
+        self._results: list = [None] * max_items
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(query_embed) -> np.ndarray:
+        vector = np.asarray(query_embed, dtype=np.float32).reshape(-1)
+        norm = float(np.sqrt(np.vdot(vector, vector)))
+        return vector / norm if norm != 0 else vector
+
+    def get(self, query_embed, threshold: float) -> Optional[Any]:
+        """Return a deep copy of the closest stored result if its cosine
+        similarity to `query_embed` is at least `threshold`, else None."""
+        query_normed = self._normalize(query_embed)
+        with self._lock:
+            if self._count == 0 or self._vectors.shape[1] != query_normed.shape[0]:
+                return None
+            scores = self._vectors[:self._count] @ query_normed
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            return copy.deepcopy(self._results[best])
+
+    def set(self, query_embed, result: Any) -> None:
+        """Store a deep copy of `result`, overwriting the oldest entry when full."""
+        query_normed = self._normalize(query_embed)
+        stored = copy.deepcopy(result)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query_normed.shape[0]:
+                # First entry, or the embedding model changed: start over
+                self._vectors = np.empty((self.max_items, query_normed.shape[0]), dtype=np.float32)
+                self._results = [None] * self.max_items
+                self._count = 0
+                self._next = 0
+            self._vectors[self._next] = query_normed
+            self._results[self._next] = stored
+            self._next = (self._next + 1) % self.max_items
+            self._count = min(self._count + 1, self.max_items)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._vectors = None
+            self._results = [None] * self.max_items
+            self._count = 0
+            self._next = 0
+
+    def __len__(self) -> int:
+        return self._count